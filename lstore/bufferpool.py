@@ -12,6 +12,7 @@ class BufferPool:
         self.pool_size = POOL_SIZE          # number of frames in the buffer pool
         self.io_count = 0                   # io operation counter (optimization metric)
         self.frames = OrderedDict()         # {page_path: Frame}; Use OrderedDict to implement LRU - most recently used items are at the end
+        self.known_dirs = set()             # directories already created, so page writes skip the makedirs syscalls
         
 
     def __repr__(self):
@@ -19,15 +20,6 @@ class BufferPool:
         return f"BufferPool(size={self.pool_size}) Frames:\n{frames_str}\n"
 
 
-    def _update_lru(self, page_path):
-        """
-        Move accessed page to end of LRU order
-        """
-        if page_path in self.frames:
-            frame = self.frames.pop(page_path)      # remove from path from current location in dict
-            self.frames[page_path] = frame          # add it back to the end of the dict (most recently used)
-        
-
     def evict_page(self):
 
         """
@@ -77,9 +69,10 @@ class BufferPool:
             Frame object if successful, None if error
         """
         # Check if frame already exists
-        if page_path in self.frames:
-            self._update_lru(page_path)
-            return self.frames[page_path]
+        frame = self.frames.get(page_path)
+        if frame is not None:
+            self.frames.move_to_end(page_path)
+            return frame
             
         # Try to make space if needed
         if len(self.frames) >= self.pool_size and not self.evict_page():
@@ -122,7 +115,10 @@ class BufferPool:
         self.io_count += 1
         try:
             # Ensure directory exists
-            os.makedirs(os.path.dirname(page_path), exist_ok=True)
+            directory = os.path.dirname(page_path)
+            if directory not in self.known_dirs:
+                os.makedirs(directory, exist_ok=True)
+                self.known_dirs.add(directory)
             
             with open(page_path, 'wb') as f:
                 f.write(page.serialize())
@@ -167,7 +163,7 @@ class BufferPool:
         frame = self.frames.get(page_path)
         if frame:
             frame.increment_pin_count()
-            self._update_lru(page_path)
+            self.frames.move_to_end(page_path)
         
             return frame.page
 
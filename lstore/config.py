@@ -4,6 +4,7 @@ PAGE_RECORD_SIZE = 512 # 512 records/page
 PAGE_RANGE_SIZE = 16 # Base pages/page range
 MERGE_THRESH = PAGE_RECORD_SIZE * PAGE_RANGE_SIZE * 4 # updates/merge
 POOL_SIZE = 1024 #pages/bufferpool
+MATERIALIZED_CACHE_SIZE = 4096 #latest versions cached/table
 
 # record meta-data columns
 INDIRECTION_COLUMN = 0
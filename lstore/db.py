@@ -65,12 +65,14 @@ class Database:
             with open(meta_path, 'wb') as f:
                 pickle.dump(metadata, f)
                 
-            # Save index data separately (without locks)
+            # Save index data separately (without locks), with pending entries merged in
+            table.index.flush_cache()
             index_path = os.path.join(self.db_path, "_tables", f"{name}_index.pickle")
             index_data = {
                 'primary_key_cache': table.index.primary_key_cache,
                 'indices': table.index.indices,
-                'sorted_records': table.index.sorted_records
+                'sorted_keys': table.index.sorted_keys,
+                'sorted_rids': table.index.sorted_rids
             }
             with open(index_path, 'wb') as f:
                 pickle.dump(index_data, f)
@@ -98,13 +100,11 @@ class Database:
             del self.table_directory[name]
             
         # Remove metadata and index files
-        meta_path = os.path.join(self.db_path, "_tables", f"{name}_metadata.pickle")
-        if os.path.exists(meta_path):
-            os.remove(meta_path)
-            
-        index_path = os.path.join(self.db_path, "_tables", f"{name}_index.pickle")
-        if os.path.exists(index_path):
-            os.remove(index_path)
+        for suffix in ("metadata", "index"):
+            try:
+                os.remove(os.path.join(self.db_path, "_tables", f"{name}_{suffix}.pickle"))
+            except FileNotFoundError:
+                pass
 
     def get_table(self, name):
         """Get table by name, creating a new instance from metadata"""
@@ -143,7 +143,12 @@ class Database:
                         # Apply index data to the newly created index
                         table.index.primary_key_cache = index_data.get('primary_key_cache', {})
                         table.index.indices = index_data.get('indices', {})
-                        table.index.sorted_records = index_data.get('sorted_records', [])
+                        table.index.sorted_keys = index_data.get('sorted_keys', [])
+                        table.index.sorted_rids = index_data.get('sorted_rids', [])
+                    # Indexes saved by older versions hold bytes rids and no sorted key/rid lists;
+                    # rebuild those once from the pages so lookups always return str
+                    if 'sorted_keys' not in index_data:
+                        table.index.refresh_indexes(table)
                 
                 # Add to tables dictionary
                 self.tables[name] = table
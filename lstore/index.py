@@ -1,20 +1,34 @@
-import bisect
-from collections import deque
+from bisect import bisect_left, bisect_right
+import heapq
+from collections import OrderedDict
+from operator import itemgetter
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Index:
     def __init__(self, table):
         self.table_name = table.name
         self.num_columns = table.num_columns
         self.indices = [None] * self.num_columns
-        # Use deque for faster append/pop operations
-        self.insert_cache = {col: deque() for col in range(self.num_columns)}
         self.max_keys = [None] * self.num_columns
-        self.insert_cache_size = 50000
-        # Increase threshold to reduce sorting frequency
-        self.unsorted_cache = {col: deque() for col in range(self.num_columns)} 
-        self.unsorted_threshold = 2000
+        # Unsorted (key, rid) entries per column that haven't been merged into its tree yet
+        self.delta = [[] for _ in range(self.num_columns)]
+        # The newest delta rid per key, so point lookups don't scan the delta
+        self.delta_latest = [{} for _ in range(self.num_columns)]
+        self.delta_threshold = 2000
+        # Whether each column's delta happens to still be in key order
+        self.delta_in_order = [True] * self.num_columns
         self.primary_key_cache = {}
-        self.sorted_records = []
+        # Primary keys and their rids as parallel sorted lists, so bisect compares bare keys
+        self.sorted_keys = []
+        self.sorted_rids = []
+        # Out-of-order primary keys waiting to be merged into sorted_keys/sorted_rids
+        self.pk_pending = []
+        # LRU of locate_range results keyed by (column, begin, end, version); any index write bumps version
+        self.range_cache = OrderedDict()
+        self.range_cache_size = 256
+        self.version = 0
         for col in range(self.num_columns):
             self.create_index(col)
 
@@ -25,164 +39,212 @@ class Index:
     def create_index(self, column_number):
         if column_number < 0 or column_number >= self.num_columns:
             return False
+        # The primary key is served by primary_key_cache/sorted_keys, no tree needed
+        if column_number == 0:
+            return
         self.indices[column_number] = BPlusTree()
+        self.version += 1
 
 
     def refresh_indexes(self, table):
         """
         Refresh all indexes based on the current state of the table.
         """
-        # Clear existing indexes
-        self.indices = [None] * self.num_columns
-        self.primary_key_cache = {}
-        self.sorted_records = []
-
-        # Recreate indexes
-        for col in range(self.num_columns):
-            self.create_index(col)
-
-        # Re-index all records in the table
-        for _, locations in table.page_directory.items():
-            base_path, base_offset = locations[0]
-            print("base path: " + base_path)
+        # Collect (key, rid) pairs per column from every base record
+        pairs = [[] for _ in range(self.num_columns)]
+        for rid, (base_path, base_offset) in table.page_directory.items():
+            if not rid.startswith("b"):
+                continue
             base_record = table.bufferpool.get_page(base_path).read_index(base_offset)
             table.bufferpool.unpin_page(base_path)
-            self.add_record(base_record)
+            rid = base_record.rid
+            for col, key in enumerate(base_record.columns):
+                if key is not None:
+                    pairs[col].append((key, rid))
+
+        # Rebuild every index in one pass instead of inserting record by record
+        self.version += 1
+        self.primary_key_cache = dict(pairs[0])
+        # Stable sorts keep equal keys in insertion order; the trees want the newest rid first
+        pairs[0].sort(key=itemgetter(0))
+        self.sorted_keys = [key for key, _ in pairs[0]]
+        self.sorted_rids = [rid for _, rid in pairs[0]]
+        self.pk_pending = []
+        self.indices = [None] * self.num_columns
+        for col in range(1, self.num_columns):
+            pairs[col].reverse()
+            pairs[col].sort(key=itemgetter(0))
+            self.indices[col] = BPlusTree.bulk_load(pairs[col])
+            self.delta[col] = []
+            self.delta_latest[col] = {}
+            self.delta_in_order[col] = True
+            self.max_keys[col] = pairs[col][-1][0] if pairs[col] else None
 
 
     """
     Flush the cache to the index
     """
     def flush_cache(self):
-        for col in range(self.num_columns):
+        self._flush_primary_key()
+        # Column trees are independent, so only visit columns with pending entries
+        pending = [col for col in range(self.num_columns) if self.delta[col]]
+        for col in pending:
             self._flush_cache_for_column(col)
 
 
+    def _flush_primary_key(self):
+        if not self.pk_pending:
+            return
+        pending = sorted(self.pk_pending, key=itemgetter(0))
+        self.pk_pending = []
+        merged = list(heapq.merge(zip(self.sorted_keys, self.sorted_rids), pending, key=itemgetter(0)))
+        self.sorted_keys = [key for key, _ in merged]
+        self.sorted_rids = [rid for _, rid in merged]
+
+
     """
     Add a record to the index more efficiently
     """
     def add_record(self, record):
-        rid_to_add = record.rid
-        encoded_rid = rid_to_add.encode('utf-8')
+        # Rids are stored as the record's own str, no per-insert encode or per-lookup decode
+        rid = record.rid
+        self.version += 1
         # For primary key (column 0), update primary key cache and sorted list
         primary_key = record.columns[0]
         if primary_key is not None:
-            self.primary_key_cache[primary_key] = encoded_rid
-            # Insert into sorted_records using bisect for O(log n) insertion
-            bisect.insort(self.sorted_records, (primary_key, encoded_rid))
-
-        for col, key in enumerate(record.columns):
+            self.primary_key_cache[primary_key] = rid
+            # Increasing keys go straight onto the end; anything else waits to be merged in one pass
+            if not self.sorted_keys or primary_key >= self.sorted_keys[-1]:
+                self.sorted_keys.append(primary_key)
+                self.sorted_rids.append(rid)
+            else:
+                self.pk_pending.append((primary_key, rid))
+                if len(self.pk_pending) >= self.delta_threshold:
+                    self._flush_primary_key()
+
+        columns = record.columns
+        delta = self.delta
+        delta_latest = self.delta_latest
+        delta_in_order = self.delta_in_order
+        threshold = self.delta_threshold
+        for col in range(1, self.num_columns):
+            key = columns[col]
             if key is None:
                 continue
-            # Instead of sorting per insert, simply append to unsorted cache
-            self.unsorted_cache[col].append((key, encoded_rid))
-            # Remove per-insert threshold check: we now defer sorting to flush_cache
-            if len(self.insert_cache[col]) >= self.insert_cache_size:
+            # Appends stay unsorted until the column's delta grows past the threshold
+            buf = delta[col]
+            if buf and key < buf[-1][0]:
+                delta_in_order[col] = False
+            buf.append((key, rid))
+            delta_latest[col][key] = rid
+            if len(buf) >= threshold:
                 self._flush_cache_for_column(col)
 
 
-    """
-    Efficiently merge two sorted lists
-    """
-    def _merge_sorted_lists(self, list1, list2):
-        result = []
-        i, j = 0, 0
-        len1, len2 = len(list1), len(list2)
-        
-        # Merge in O(n+m) time
-        while i < len1 and j < len2:
-            if list1[i][0] <= list2[j][0]:
-                result.append(list1[i])
-                i += 1
-            else:
-                result.append(list2[j])
-                j += 1
-                
-        # Add remaining elements
-        result.extend(list1[i:])
-        result.extend(list2[j:])
-        return result
-
-
     """
     Flush cache for a column with improved batch handling
     """
     def _flush_cache_for_column(self, col):
-        # In flush, if unsorted_cache exists, sort it once
-        if self.unsorted_cache[col]:
-            sorted_unsorted = sorted(self.unsorted_cache[col], key=lambda x: x[0])
-            # Merge with any existing sorted insert_cache
-            if self.insert_cache[col]:
-                cache = self._merge_sorted_lists(self.insert_cache[col], sorted_unsorted)
-            else:
-                cache = sorted_unsorted
-            self.insert_cache[col] = cache
-            self.unsorted_cache[col] = []
-            
-        if not self.insert_cache[col]:
+        # Nothing new hit this column since the last flush
+        buf = self.delta[col]
+        if not buf:
             return
-            
+        # Monotone inserts (e.g. increasing keys) are already sorted, skip the sort.
+        # Equal keys stay oldest-first, so setting them one by one leaves the newest in front
+        cache = buf if self.delta_in_order[col] else sorted(buf, key=itemgetter(0))
+        self.delta[col] = []
+        self.delta_latest[col] = {}
+        self.delta_in_order[col] = True
+
         try:
-            batch_size = 5000
-            for i in range(0, len(self.insert_cache[col]), batch_size):
-                batch = self.insert_cache[col][i:i+batch_size]
-                try:
-                    self.indices[col].batch_insert(batch)
-                except ValueError:
-                    for (k, v) in batch:
-                        self.indices[col][k] = v
+            tree = self.indices[col]
+            # Only keys at or below the tree's max overlap it; the rest can still be appended
+            split = bisect_right(cache, tree.max_key(), key=itemgetter(0)) if len(tree) > 0 else 0
+            if split and split * 10 >= len(tree):
+                # Large overlap: two-finger merge with the existing keys and rebuild bottom-up,
+                # the delta's equal keys newest-first and ahead of the tree's older ones
+                newest_first = sorted(reversed(cache), key=itemgetter(0))
+                self.indices[col] = BPlusTree.bulk_load(heapq.merge(newest_first, tree.items(), key=itemgetter(0)), tree.order)
+            else:
+                for (k, v) in cache[:split]:
+                    tree[k] = v
+                batch_size = 5000
+                for i in range(split, len(cache), batch_size):
+                    batch = cache[i:i+batch_size]
+                    try:
+                        tree.batch_insert(batch)
+                    except ValueError:
+                        for (k, v) in batch:
+                            tree[k] = v
         except Exception as e:
-            print(f"Error in batch insert: {e}, falling back to individual inserts")
-            for (k, v) in self.insert_cache[col]:
+            logger.debug("Error in batch insert: %s, falling back to individual inserts", e)
+            for (k, v) in cache:
                 self.indices[col][k] = v
-                
-        if self.insert_cache[col]:
-            if self.max_keys[col] is None or self.insert_cache[col][-1][0] > self.max_keys[col]:
-                self.max_keys[col] = self.insert_cache[col][-1][0]
-        self.insert_cache[col] = []
+
+        if self.max_keys[col] is None or cache[-1][0] > self.max_keys[col]:
+            self.max_keys[col] = cache[-1][0]
 
 
     """
     Locate a record in the index
     """
     def locate(self, column, value):
-        # For primary key lookups, use cache
-        if column == 0 and value in self.primary_key_cache:
-            return self.primary_key_cache[value].decode('utf-8')
-        # Instead of flushing all columns, flush only the target column
-        self._flush_cache_for_column(column)
+        # Primary key lookups never touch a tree; the cache holds every key in sorted_keys
+        if column == 0:
+            return self.primary_key_cache.get(value, False)
         if value is None:
             return False
+        # The delta holds the latest rids, so check its key map before the tree
+        rid = self.delta_latest[column].get(value)
+        if rid is not None:
+            return rid
         try:
-            val = self.indices[column][value]
-            if val is not None:
-                return val.decode('utf-8')
+            return self.indices[column][value]
         except KeyError:
             return False
-        return False
 
 
     """
     Locate a range of records in the index
     """
     def locate_range(self, begin, end, column):
-        # For aggregates on primary key (column 0), use the sorted_records structure
+        cache = self.range_cache
+        cache_key = (column, begin, end, self.version)
+        result = cache.get(cache_key)
+        if result is not None:
+            try:
+                cache.move_to_end(cache_key)
+            except KeyError:
+                pass    # Evicted by another thread after the get
+        else:
+            result = self._locate_range(begin, end, column)
+            cache[cache_key] = result
+            try:
+                # The size comes from the cache itself, so racing callers can't skew it
+                while len(cache) > self.range_cache_size:
+                    cache.popitem(last=False)
+            except KeyError:
+                pass    # Another thread emptied it first
+        # The cached dict is shared, so every caller gets its own copy
+        return dict(result) if result else result
+
+
+    def _locate_range(self, begin, end, column):
+        # For aggregates on primary key (column 0), use the sorted key/rid lists
         if column == 0:
-            result = {}
-            left = bisect.bisect_left(self.sorted_records, (begin, b""))
-            right = bisect.bisect_right(self.sorted_records, (end, b"\xff"))
-            for key, encoded_rid in self.sorted_records[left:right]:
-                result[key] = encoded_rid.decode('utf-8')
-            return result if result else False
+            self._flush_primary_key()
+            left = bisect_left(self.sorted_keys, begin)
+            right = bisect_right(self.sorted_keys, end)
+            if left == right:
+                return False
+            return dict(zip(self.sorted_keys[left:right], self.sorted_rids[left:right]))
         # For other columns, flush only that column's cache.
         self._flush_cache_for_column(column)
-        result = {}
         rng = self.indices[column][begin: end + 1]
         if not rng:
             return False
-        for key in rng:
-            result[key] = self.indices[column][key].decode('utf-8')
-        return result if result else False
+        # The scan already yielded the rids, the newest per key like locate
+        return rng
     
     def __getstate__(self):
         """
@@ -209,13 +271,44 @@ class BPlusTree:
         self.order = order
         self.max_keys = order - 1
         self.root = BPlusTreeNode(is_leaf=True)
+        self.rightmost_leaf = self.root
         self._size = 0
+        # Bloom filter over inserted keys so negative lookups skip the descent
+        self._reset_bloom(0)
+
+    def _reset_bloom(self, num_keys):
+        # 8-16 bits per key, rounded to a power of two so positions are a mask
+        bloom_bits = max(1 << 10, 1 << (num_keys * 8).bit_length())
+        self.bloom_mask = bloom_bits - 1
+        self.bloom = bytearray(bloom_bits >> 3)
+
+    def _rebuild_bloom(self):
+        self._reset_bloom(self._size)
+        for k, _ in self.items():
+            self._bloom_add(k)
+
+    def _bloom_positions(self, key):
+        h = hash(key)
+        return h & self.bloom_mask, ((h * 0x9E3779B97F4A7C15) >> 32) & self.bloom_mask
+
+    def _bloom_add(self, key):
+        bloom = self.bloom
+        for pos in self._bloom_positions(key):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, key):
+        bloom = self.bloom
+        for pos in self._bloom_positions(key):
+            if not bloom[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
 
     def search(self, key):
+        # Module-level bisect names skip an attribute lookup per level of the descent.
+        # Equal keys can straddle a separator, so take the leftmost child that may hold key
         node = self.root
         while not node.is_leaf:
-            i = bisect.bisect_right(node.keys, key)
-            node = node.children[i]
+            node = node.children[bisect_left(node.keys, key)]
         return node
 
     def __getitem__(self, key):
@@ -223,45 +316,71 @@ class BPlusTree:
             start, stop = key.start, key.stop
             result = {}
             node = self.search(start)
+            # Bound each leaf with bisect and copy the slice, instead of comparing key by key
+            lo = bisect_left(node.keys, start)
             while node:
-                for k, v in zip(node.keys, node.children):
-                    if k < start:
-                        continue
-                    if stop is not None and k >= stop:
-                        return result
-                    result[k] = v
+                keys = node.keys
+                hi = len(keys) if stop is None else bisect_left(keys, stop, lo)
+                # Equal keys are stored newest first, so the first rid per key wins
+                for k, v in zip(keys[lo:hi], node.children[lo:hi]):
+                    if k not in result:
+                        result[k] = v
+                if hi < len(keys):
+                    return result
                 node = node.next
+                lo = 0
             return result
         else:
-            leaf = self.search(key)
-            i = bisect.bisect_left(leaf.keys, key)
-            if i < len(leaf.keys) and leaf.keys[i] == key:
-                return leaf.children[i]
+            if not self.might_contain(key):
+                raise KeyError(f"Key {key} not found")
+            # Descend inline rather than through search(), saving a call on every point lookup
+            node = self.root
+            while not node.is_leaf:
+                node = node.children[bisect_left(node.keys, key)]
+            i = bisect_left(node.keys, key)
+            # The first (newest) match may open the next leaf
+            if i == len(node.keys) and node.next is not None:
+                node, i = node.next, 0
+            if i < len(node.keys) and node.keys[i] == key:
+                return node.children[i]
             raise KeyError(f"Key {key} not found")
 
     def __setitem__(self, key, value):
-        root = self.root
-        if len(root.keys) == self.max_keys:
-            new_root = BPlusTreeNode(is_leaf=False)
-            new_root.children.append(root)
-            self.split_child(new_root, 0)
-            self.root = new_root
-        self.insert_non_full(self.root, key, value)
-        self._size += 1  
+        leaf = self.rightmost_leaf
+        if len(leaf.keys) < self.max_keys and (not leaf.keys or key > leaf.keys[-1]):
+            # Keys past the current max belong at the end of the rightmost leaf, skip the descent.
+            # An equal key takes the slow path so it lands in front of the older ones
+            leaf.keys.append(key)
+            leaf.children.append(value)
+        else:
+            root = self.root
+            if len(root.keys) == self.max_keys:
+                new_root = BPlusTreeNode(is_leaf=False)
+                new_root.children.append(root)
+                self.split_child(new_root, 0)
+                self.root = new_root
+            self.insert_non_full(self.root, key, value)
+        self._size += 1
+        # Double the filter once it drops below 8 bits per key
+        if self._size << 3 > self.bloom_mask:
+            self._rebuild_bloom()
+        else:
+            self._bloom_add(key)
 
     def insert_non_full(self, node, key, value):
-        if node.is_leaf:
-            i = bisect.bisect_left(node.keys, key)
-            node.keys.insert(i, key)
-            node.children.insert(i, value)
-        else:
-            i = bisect.bisect_right(node.keys, key)
-            child = node.children[i]
-            if len(child.keys) == self.max_keys:
+        # Walk down splitting full children on the way, then insert into the leaf once,
+        # ahead of any equal keys so lookups find the newest value first
+        max_keys = self.max_keys
+        while not node.is_leaf:
+            i = bisect_left(node.keys, key)
+            if len(node.children[i].keys) == max_keys:
                 self.split_child(node, i)
-                if key >= node.keys[i]:
+                if key > node.keys[i]:
                     i += 1
-            self.insert_non_full(node.children[i], key, value)
+            node = node.children[i]
+        i = bisect_left(node.keys, key)
+        node.keys.insert(i, key)
+        node.children.insert(i, value)
 
     def split_child(self, parent, index):
         node = parent.children[index]
@@ -274,6 +393,8 @@ class BPlusTree:
             node.children = node.children[:mid]
             new_node.next = node.next
             node.next = new_node
+            if new_node.next is None:
+                self.rightmost_leaf = new_node
             split_key = new_node.keys[0]
         else:
             split_key = node.keys[mid]
@@ -292,6 +413,49 @@ class BPlusTree:
         for key, value in pairs:
             self.__setitem__(key, value)
 
+    @classmethod
+    def bulk_load(cls, sorted_pairs, order=75):
+        """
+        Build a tree bottom-up from (key, value) pairs already sorted by key.
+        Leaves and internal nodes are packed to 75% so later inserts don't split right away.
+        """
+        tree = cls(order)
+        pairs = list(sorted_pairs)
+        if not pairs:
+            return tree
+        tree._reset_bloom(len(pairs))
+        leaf_fill = max(1, int(tree.max_keys * 0.75))
+        node_fill = max(2, int(order * 0.75))
+
+        # Pack the leaves and thread their next pointers
+        level = []
+        for i in range(0, len(pairs), leaf_fill):
+            leaf = BPlusTreeNode(is_leaf=True)
+            leaf.keys = [k for k, _ in pairs[i:i+leaf_fill]]
+            leaf.children = [v for _, v in pairs[i:i+leaf_fill]]
+            if level:
+                level[-1].next = leaf
+            level.append(leaf)
+        tree.rightmost_leaf = level[-1]
+        mins = [leaf.keys[0] for leaf in level]
+
+        # Each internal level separates its children by their smallest key
+        while len(level) > 1:
+            parents, parent_mins = [], []
+            for i in range(0, len(level), node_fill):
+                node = BPlusTreeNode(is_leaf=False)
+                node.children = level[i:i+node_fill]
+                node.keys = mins[i+1:i+node_fill]
+                parents.append(node)
+                parent_mins.append(mins[i])
+            level, mins = parents, parent_mins
+        tree.root = level[0]
+
+        for k, _ in pairs:
+            tree._bloom_add(k)
+        tree._size = len(pairs)
+        return tree
+
     def max_key(self):
         node = self.root
         while not node.is_leaf:
@@ -301,9 +465,25 @@ class BPlusTree:
     def __len__(self):
         return self._size
 
+    def __getstate__(self):
+        # The Bloom filter is rebuilt on load rather than stored
+        state = self.__dict__.copy()
+        state.pop('bloom', None)
+        state.pop('bloom_mask', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Older pickles predate the rightmost leaf pointer
+        if 'rightmost_leaf' not in state:
+            node = self.root
+            while not node.is_leaf:
+                node = node.children[-1]
+            self.rightmost_leaf = node
+        self._rebuild_bloom()
+
     # Add a method to get all key-value pairs
     def items(self):
-        __slots__ = ('is_leaf', 'keys', 'children', 'next')
         """Get all key-value pairs in the tree"""
         result = []
         node = self.root
@@ -318,8 +498,20 @@ class BPlusTree:
 
 
 class BPlusTreeNode:
+    __slots__ = ('is_leaf', 'keys', 'children', 'next')
+
     def __init__(self, is_leaf=False):
         self.is_leaf = is_leaf
         self.keys = []
         self.children = []
         self.next = None
+
+    def __getstate__(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __setstate__(self, state):
+        # Nodes pickled before __slots__ was added carry a plain instance dict
+        if isinstance(state, tuple):
+            state = state[1]
+        for slot in self.__slots__:
+            setattr(self, slot, state.get(slot))
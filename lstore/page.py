@@ -1,4 +1,5 @@
 import msgpack
+import struct
 from lstore.config import PAGE_RECORD_SIZE
 import threading
 
@@ -6,7 +7,7 @@ class Page:
     def __init__(self):
         self.num_records = 0
         self.data = []
-        self._write_lock = threading.RLock()
+        self._write_lock = threading.Lock()
 
     def __repr__(self):
         return f"num_records: {self.num_records}  |  data: {self.data}"
@@ -15,12 +16,14 @@ class Page:
         return self.num_records < PAGE_RECORD_SIZE
 
     def write(self, record):  # Append record
+        # Concurrent updaters share tail pages, so the slot and the append must happen together
         with self._write_lock:
-            if not self.has_capacity():
+            slot = len(self.data)
+            if slot >= PAGE_RECORD_SIZE:
                 return
             self.data.append(record)
-            self.num_records += 1
-            return self.num_records-1
+            self.num_records = slot + 1
+            return slot
     
     def overwrite_index(self, index, record):  # Overwrite record at index
         self.data[index] = record
@@ -40,6 +43,48 @@ class Page:
         Returns:
             bytes: Serialized page data
         """
+        try:
+            return self._serialize_packed()
+        except (struct.error, TypeError, ValueError):
+            # Values that don't fit the fixed layout (e.g. ints past int64) fall back to msgpack
+            return self._serialize_msgpack()
+
+    def _serialize_packed(self):
+        """
+        Fixed-width layout: a header followed by one struct per record, no per-record dicts.
+        Columns are stored as int32 when every value fits, int64 otherwise
+        """
+        num_columns = len(self.data[0].columns) if self.data else 0
+        narrow = all(NULL_VALUE_32 < value <= INT32_MAX
+                     for record in self.data for value in record.columns if value is not None)
+        if narrow:
+            magic, null_value, record_struct = PACKED32_MAGIC, NULL_VALUE_32, _record_struct(num_columns, "i")
+        else:
+            # A real NULL_VALUE would read back as None, so such pages fall back to msgpack
+            if any(value == NULL_VALUE for record in self.data for value in record.columns):
+                raise ValueError("column value collides with NULL_VALUE")
+            magic, null_value, record_struct = PACKED_MAGIC, NULL_VALUE, _record_struct(num_columns)
+        buf = bytearray(_HEADER.size + record_struct.size * len(self.data))
+        _HEADER.pack_into(buf, 0, magic, self.num_records, len(self.data), num_columns)
+        offset = _HEADER.size
+        for record in self.data:
+            schema_bits = 0
+            for i, bit in enumerate(record.schema_encoding):
+                if bit:
+                    schema_bits |= 1 << i
+            record_struct.pack_into(
+                buf, offset,
+                _encode_rid(record.base_rid),
+                _encode_rid(record.indirection),
+                _encode_rid(record.rid),
+                record.start_time,
+                schema_bits,
+                *[null_value if value is None else value for value in record.columns]
+            )
+            offset += record_struct.size
+        return bytes(buf)
+
+    def _serialize_msgpack(self):
         page_data = {
             'num_records': self.num_records,
             'records': []
@@ -72,6 +117,24 @@ class Page:
         
         # Create new page
         page = cls()
+
+        magic = data[:1]
+        if magic == PACKED_MAGIC or magic == PACKED32_MAGIC:
+            _, page.num_records, count, num_columns = _HEADER.unpack_from(data, 0)
+            if magic == PACKED32_MAGIC:
+                null_value, record_struct = NULL_VALUE_32, _record_struct(num_columns, "i")
+            else:
+                null_value, record_struct = NULL_VALUE, _record_struct(num_columns)
+            for base_rid, indirection, rid, start_time, schema_bits, *columns in record_struct.iter_unpack(data[_HEADER.size:_HEADER.size + record_struct.size * count]):
+                page.data.append(Record(
+                    _decode_rid(base_rid),
+                    _decode_rid(indirection),
+                    _decode_rid(rid),
+                    start_time,
+                    [(schema_bits >> i) & 1 for i in range(num_columns)],
+                    [None if value == null_value else value for value in columns]
+                ))
+            return page
         
         # Unpack the serialized data
         page_data = msgpack.unpackb(data)
@@ -91,3 +154,35 @@ class Page:
             )
             page.data.append(record)
         return page
+
+
+# Fixed-width page layout
+PACKED_MAGIC = b"\xc1"                 # Never used by msgpack, so it tells the two formats apart
+PACKED32_MAGIC = b"\xc2"               # Same layout with int32 columns; msgpack pages always start with a map
+NULL_VALUE = -(1 << 63)                 # Stands in for a None column
+NULL_VALUE_32 = -(1 << 31)              # None in int32 columns
+INT32_MAX = (1 << 31) - 1
+_HEADER = struct.Struct("<cIII")        # magic, num_records, stored records, num_columns
+_record_structs = {}
+
+
+def _record_struct(num_columns, column_format="q"):
+    # base_rid, indirection, rid, start_time (ns), schema bits, columns
+    key = (num_columns, column_format)
+    if key not in _record_structs:
+        _record_structs[key] = struct.Struct(f"<qqqqQ{num_columns}{column_format}")
+    return _record_structs[key]
+
+
+def _encode_rid(rid):
+    # 'b12' -> 24, 't12' -> 25
+    tag = rid[0]
+    if tag == "b":
+        return int(rid[1:]) << 1
+    if tag == "t":
+        return (int(rid[1:]) << 1) | 1
+    raise ValueError(f"Unexpected rid {rid}")
+
+
+def _decode_rid(value):
+    return f"{'t' if value & 1 else 'b'}{value >> 1}"
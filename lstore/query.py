@@ -1,9 +1,10 @@
 import os
+import re
 import time
-import copy
+from functools import lru_cache
 from lstore.table import Record
 from lstore.page import Page
-from lstore.config import MERGE_THRESH, PAGE_RANGE_SIZE
+from lstore.config import MERGE_THRESH, PAGE_RANGE_SIZE, MATERIALIZED_CACHE_SIZE
 
 class Query:
     """
@@ -31,34 +32,38 @@ class Query:
         base_rid = self.table.index.locate(0, primary_key)
         if base_rid is False or not base_rid:
             return False
-        if isinstance(base_rid, bytes):
-            base_rid = base_rid.decode()
+
+        page_directory = self.table.page_directory
+        bufferpool = self.table.bufferpool
 
         # Retrieve base record
-        base_path, base_offset = self.table.page_directory[base_rid]
-        base_record = self.table.bufferpool.get_page(base_path).read_index(base_offset)
-        self.table.bufferpool.unpin_page(base_path)
+        base_path, base_offset = page_directory[base_rid]
+        base_record = bufferpool.get_page(base_path).read_index(base_offset)
+        bufferpool.unpin_page(base_path)
 
-        # Get last tail record
-        last_tail_path, last_tail_offset = self.table.page_directory[base_record.indirection]
-        last_tail_record = self.table.bufferpool.get_page(last_tail_path).read_index(last_tail_offset)
-        self.table.bufferpool.unpin_page(last_tail_path)
+        # Get last tail record; a record that was never updated is its own latest version
+        if base_record.indirection == base_record.rid:
+            last_tail_record = base_record
+        else:
+            last_tail_path, last_tail_offset = page_directory[base_record.indirection]
+            last_tail_record = bufferpool.get_page(last_tail_path).read_index(last_tail_offset)
+            bufferpool.unpin_page(last_tail_path)
 
         # Create deletion marker record
         record = Record(
             base_record.rid,
             last_tail_record.rid,
             f"t{self.table.current_tail_rid}",
-            time.time(),
+            time.time_ns(),
             [0] * len(base_record.schema_encoding),
             [None] * len(base_record.columns)
         )
 
         # Get pagerange index from base path
-        base_pagerange_index = int(base_path.split("pagerange_")[1].split("/")[0])
+        base_pagerange_index = _pagerange_index(base_path)
 
         tail_path = self.table.tail_page_locations[base_pagerange_index]
-        tail_page = self.table.bufferpool.get_page(tail_path)
+        tail_page = bufferpool.get_page(tail_path)
 
         # Write to appropriate page
         if tail_page.has_capacity():
@@ -68,13 +73,13 @@ class Query:
             new_path = f"{self.table.path}/pagerange_{base_pagerange_index}/tail/page_{len(self.table.tail_page_locations)-1}"
             new_page = Page()
             new_page.write(record)
-            self.table.bufferpool.add_frame(new_path, new_page)
+            bufferpool.add_frame(new_path, new_page)
             self.table.tail_page_locations[base_pagerange_index] = new_path
             insert_path, offset = new_path, 0
 
         # Update metadata
-        self.table.bufferpool.unpin_page(tail_path)
-        self.table.page_directory[record.rid] = [insert_path, offset]
+        bufferpool.unpin_page(tail_path)
+        page_directory[record.rid] = (insert_path, offset)
         self.table.index.add_record(record)
         self.table.current_tail_rid += 1
 
@@ -83,6 +88,8 @@ class Query:
         if self.table.pr_unmerged_updates[base_pagerange_index] >= MERGE_THRESH:
             self.table.merge(base_pagerange_index)
 
+        # The cached latest version is stale once the tail record is written
+        self.table.materialized_cache.pop(base_rid, None)
         return True
 
 
@@ -95,68 +102,67 @@ class Query:
     def insert(self, *columns):
         if not self._verify_insert_input(*columns):
             return False
-        record = Record(f"b{self.table.current_base_rid}", f"b{self.table.current_base_rid}", f"b{self.table.current_base_rid}", time.time(), [0] * len(columns), [*columns])
+        bufferpool = self.table.bufferpool
+        rid = f"b{self.table.current_base_rid}"
+        record = Record(rid, rid, rid, time.time_ns(), [0] * len(columns), [*columns])
         self.table.index.add_record(record)
         
-        last_path = self.table.base_page_locations[len(self.table.base_page_locations) - 1]
-        last_page = self.table.bufferpool.get_page(last_path)
-
-        last_page = self.table.bufferpool.get_page(last_path)
-        self.table.bufferpool.unpin_page(last_path)
+        last_path = self.table.base_page_locations[-1]
+        last_page = bufferpool.get_page(last_path)
+        bufferpool.unpin_page(last_path)
+        # Memoized per path, so this is a dict hit rather than a parse on every insert
         last_pagerange_index, last_page_index = self._parse_page_path(last_path)
         
         if last_page.has_capacity():
             last_page.write(record)
-            self.table.bufferpool.update_page(last_path, make_dirty=True)
+            bufferpool.update_page(last_path, make_dirty=True)
             self.table.tail_page_locations[last_pagerange_index] = last_path
             insert_path = self.table.last_path
             offset = last_page.num_records - 1
         else:
-            new_page = Page() 
-            new_page.write(record)
-            self.table.bufferpool.update_page(last_path, make_dirty=True)
-
-            insert_path = last_path
-            offset = 0
-            if last_page_index + 1 < PAGE_RANGE_SIZE:
-                insert_path = f"{self.table.path}/pagerange_{last_pagerange_index}/base/page_{last_page_index + 1}"
-                self.table.pr_unmerged_updates.append(0)
-            else:
-                new_pagerange_path = f"{self.table.path}/pagerange_{last_pagerange_index + 1}"
-                os.makedirs(f"{new_pagerange_path}/base", exist_ok=True)
-                os.makedirs(f"{new_pagerange_path}/tail", exist_ok=True)
-                insert_path = f"{new_pagerange_path}/base/page_0"
-                self.table.page_range_tps[last_pagerange_index + 1] = 0
-                self.table.tail_page_locations.append(insert_path)
-                self.table.original_per_page_range.append([0]*PAGE_RANGE_SIZE)
-                first_tail_page = Page()
-                self.table.bufferpool.add_frame(f"{new_pagerange_path}/tail/page_0", first_tail_page)
-    
-        
-            self.table.last_path = insert_path
-            self.table.bufferpool.add_frame(insert_path, new_page)
+            insert_path, offset = self._insert_rollover(record, last_path, last_pagerange_index, last_page_index)
         
-        self.table.page_directory[f"b{self.table.current_base_rid}"] = [insert_path, offset]
+        self.table.page_directory[rid] = (insert_path, offset)
         self.table.current_base_rid += 1
         return True
+
+
+    def _insert_rollover(self, record, last_path, last_pagerange_index, last_page_index):
+        # insert() when the last base page is full: start the next page, or the next page range
+        new_page = Page()
+        new_page.write(record)
+        self.table.bufferpool.update_page(last_path, make_dirty=True)
+
+        insert_path = last_path
+        offset = 0
+        if last_page_index + 1 < PAGE_RANGE_SIZE:
+            insert_path = f"{self.table.path}/pagerange_{last_pagerange_index}/base/page_{last_page_index + 1}"
+            self.table.pr_unmerged_updates.append(0)
+        else:
+            new_pagerange_path = f"{self.table.path}/pagerange_{last_pagerange_index + 1}"
+            os.makedirs(f"{new_pagerange_path}/base", exist_ok=True)
+            os.makedirs(f"{new_pagerange_path}/tail", exist_ok=True)
+            insert_path = f"{new_pagerange_path}/base/page_0"
+            self.table.page_range_tps[last_pagerange_index + 1] = 0
+            self.table.tail_page_locations.append(insert_path)
+            self.table.original_per_page_range.append([0]*PAGE_RANGE_SIZE)
+            first_tail_page = Page()
+            self.table.bufferpool.add_frame(f"{new_pagerange_path}/tail/page_0", first_tail_page)
+
+        self.table.last_path = insert_path
+        self.table.bufferpool.add_frame(insert_path, new_page)
+        return insert_path, offset
     
     
     def _verify_insert_input(self, *columns):
-        for column in columns:
-            if not isinstance(column, int):
-                return False
-        return True
+        # An exact type check is cheaper than isinstance, and it also rejects bool
+        return all(type(column) is int for column in columns)
 
 
     def _parse_page_path(self, path):
         # Extract pagerange index and page index from a path
         try:
-            pagerange_part = path.split("pagerange_")[1]
-            pagerange_index = int(pagerange_part.split("/")[0])
-            page_part = path.split("page_")[1]
-            # Remove potential file extension if present.
-            page_index = int(page_part.split("/")[0].split('.')[0])
-            return pagerange_index, page_index
+            return _page_path_indices(path)
         except Exception as e:
             print("Error parsing page path:", e)
             return 0, 0
@@ -173,31 +179,43 @@ class Query:
     """
     def select(self, search_key, search_key_index, projected_columns_index):
         # Get the base rids of the records with the search key
-        rid_combined_string = self.table.index.locate(search_key_index, search_key)
-        if rid_combined_string == False:
+        rid = self.table.index.locate(search_key_index, search_key)
+        if rid == False:
             return False
         
-        rid_list = rid_combined_string.split(",")
+        # The index holds a single rid per key, so there is nothing to split apart
+        rid_list = [rid]
         
-        # Merge the lineage
+        # Merge the lineage, reading each page once for all the rids on it
+        projected = self._projected_indices(projected_columns_index)
         records = []
-        for rid in rid_list:
-            new_record = self._get_merged_lineage(rid, projected_columns_index)
-            if new_record:
-                records.append(new_record)
+        for latest in self._get_latest_records_many(rid_list):
+            if latest:
+                records.append(self._project(latest, projected))
         return records if records else False
 
 
-    def _get_merged_lineage(self, base_rid, projected_columns_index):  
+    def _get_latest_records(self, base_rid):
+        # Returns (base_record, latest_record) for a base rid, or None if it can't be read
+        cached = self.table.materialized_cache.get(base_rid)
+        if cached is not None:
+            try:
+                self.table.materialized_cache.move_to_end(base_rid)
+            except KeyError:
+                pass    # Another thread evicted it after the get; the copy we hold is still valid
+            return cached
         try:
-            if base_rid not in self.table.page_directory:
+            page_directory = self.table.page_directory
+            bufferpool = self.table.bufferpool
+            entry = page_directory.get(base_rid)
+            if entry is None:
                 print(f"RID {base_rid} not found in page directory")
                 return None
                 
             # Get base record
-            base_path, base_offset = self.table.page_directory[base_rid]
-            base_page = self.table.bufferpool.get_page(base_path)
-            self.table.bufferpool.unpin_page(base_path)
+            base_path, base_offset = entry
+            base_page = bufferpool.get_page(base_path)
+            bufferpool.unpin_page(base_path)
             if base_page is None:
                 print(f"Base page not found at {base_path}")
                 return None
@@ -208,45 +226,145 @@ class Query:
             
             base_record = base_page.read_index(base_offset)
             
-            # Get latest tail record
-            last_tail_path, last_tail_offset = self.table.page_directory[base_record.indirection]
-            tail_page = self.table.bufferpool.get_page(last_tail_path)
-            self.table.bufferpool.unpin_page(last_tail_path)
-            if tail_page is None:
-                print(f"Tail page not found at {last_tail_path}")
-                return None
-                
-            if last_tail_offset >= tail_page.num_records:
-                print(f"Tail record offset {last_tail_offset} out of range (page has {tail_page.num_records} records)")
-                return None
-                
-            last_tail_record = tail_page.read_index(last_tail_offset)
+            # Get latest tail record; a record that was never updated is its own latest version
+            if base_record.indirection == base_record.rid:
+                last_tail_record = base_record
+            else:
+                last_tail_path, last_tail_offset = page_directory[base_record.indirection]
+                tail_page = bufferpool.get_page(last_tail_path)
+                bufferpool.unpin_page(last_tail_path)
+                if tail_page is None:
+                    print(f"Tail page not found at {last_tail_path}")
+                    return None
+                    
+                if last_tail_offset >= tail_page.num_records:
+                    print(f"Tail record offset {last_tail_offset} out of range (page has {tail_page.num_records} records)")
+                    return None
+                    
+                last_tail_record = tail_page.read_index(last_tail_offset)
             
-            # Build the projected record
-            new_record = Record(
-                base_record.rid,
-                last_tail_record.rid, 
-                base_record.indirection,
-                last_tail_record.start_time,
-                last_tail_record.schema_encoding,
-                [element for element, bit in zip(last_tail_record.columns, projected_columns_index) if bit == 1]
-            )
-            return new_record
+            return self._cache_latest(base_rid, (base_record, last_tail_record))
         except Exception as e:
-            print(f"Error in _get_merged_lineage for {base_rid}: {e}")
+            print(f"Error in _get_latest_records for {base_rid}: {e}")
             return None
 
 
-    # Get list of records from base_rid
-    def _traverse_lineage(self, base_rid):
-        lineage = []
-        if isinstance(base_rid, bytes):
-            base_rid = base_rid.decode()  # Ensure base_rid is a string
+    def _get_latest_records_many(self, base_rids):
+        # Same as _get_latest_records for each rid, but grouped by page so each page is fetched once
+        cache = self.table.materialized_cache
+        page_directory = self.table.page_directory
+        bufferpool = self.table.bufferpool
+        results = {}
+        base_reads = {}     # {base_path: [(base_rid, offset)]}
+        for base_rid in base_rids:
+            cached = cache.get(base_rid)
+            if cached is not None:
+                try:
+                    cache.move_to_end(base_rid)
+                except KeyError:
+                    pass    # Evicted by another thread after the get
+                results[base_rid] = cached
+            elif base_rid in page_directory:
+                base_path, base_offset = page_directory[base_rid]
+                base_reads.setdefault(base_path, []).append((base_rid, base_offset))
+            else:
+                results[base_rid] = self._get_latest_records(base_rid)
+
+        tail_reads = {}     # {tail_path: [(base_rid, base_record, offset)]}
+        for base_path, entries in base_reads.items():
+            base_page = bufferpool.get_page(base_path)
+            bufferpool.unpin_page(base_path)
+            for base_rid, base_offset in entries:
+                if base_page is None or base_offset >= base_page.num_records:
+                    # Let the single-rid path report the problem
+                    results[base_rid] = self._get_latest_records(base_rid)
+                    continue
+                base_record = base_page.read_index(base_offset)
+                if base_record.indirection == base_record.rid:
+                    results[base_rid] = self._cache_latest(base_rid, (base_record, base_record))
+                elif base_record.indirection in page_directory:
+                    tail_path, tail_offset = page_directory[base_record.indirection]
+                    tail_reads.setdefault(tail_path, []).append((base_rid, base_record, tail_offset))
+                else:
+                    results[base_rid] = self._get_latest_records(base_rid)
+
+        for tail_path, entries in tail_reads.items():
+            tail_page = bufferpool.get_page(tail_path)
+            bufferpool.unpin_page(tail_path)
+            for base_rid, base_record, tail_offset in entries:
+                if tail_page is None or tail_offset >= tail_page.num_records:
+                    results[base_rid] = self._get_latest_records(base_rid)
+                    continue
+                results[base_rid] = self._cache_latest(base_rid, (base_record, tail_page.read_index(tail_offset)))
+
+        return [results[base_rid] for base_rid in base_rids]
+
+
+    def _cache_latest(self, base_rid, latest):
+        # Remember a base rid's latest version, evicting the least recently used past the size cap
+        cache = self.table.materialized_cache
+        cache[base_rid] = latest
+        if len(cache) > MATERIALIZED_CACHE_SIZE:
+            cache.popitem(last=False)
+        return latest
+
+
+    def _projected_indices(self, projected_columns_index):
+        # Turn the 0/1 projection vector into column positions once per query, not once per record.
+        # Selecting every column (the common case) becomes a slice, copied in one C-level step.
+        picks = [i for i, bit in enumerate(projected_columns_index) if bit == 1]
+        if len(picks) == len(projected_columns_index):
+            return slice(0, len(picks))
+        return picks
+
+
+    def _project(self, latest, projected):
+        base_record, last_tail_record = latest
+        columns = last_tail_record.columns
+
+        # Build the projected record
+        return Record(
+            base_record.rid,
+            last_tail_record.rid, 
+            base_record.indirection,
+            last_tail_record.start_time,
+            last_tail_record.schema_encoding,
+            columns[projected] if type(projected) is slice else [columns[i] for i in projected]
+        )
 
-        if base_rid not in self.table.page_directory:
-            return []
-       
-        return lineage
+
+    def _walk_versions(self, rids, hops, stop_at_base):
+        """
+        Follow each rid's indirection chain `hops` records deep and return the last record read for each.
+        All chains advance one hop at a time, so each page is fetched once per hop for every rid on it.
+        With stop_at_base, a chain stops once it points back at its base record; records that were
+        never updated stop after their base record either way.
+        """
+        page_directory = self.table.page_directory
+        bufferpool = self.table.bufferpool
+        next_rids = list(rids)
+        records = [None] * len(next_rids)
+        active = range(len(next_rids))
+        for _ in range(hops):
+            if not active:
+                break
+            by_path = {}
+            for i in active:
+                path, offset = page_directory[next_rids[i]]
+                by_path.setdefault(path, []).append((i, offset))
+            active = []
+            for path, entries in by_path.items():
+                page = bufferpool.get_page(path)
+                bufferpool.unpin_page(path)
+                for i, offset in entries:
+                    record = records[i] = page.read_index(offset)
+                    indirection = next_rids[i] = record.indirection
+                    # A never-updated base record points at itself, so further hops would re-read it
+                    if indirection == record.rid:
+                        continue
+                    if not (stop_at_base and indirection == record.base_rid):
+                        active.append(i)
+        return records
 
 
     """
@@ -261,28 +379,14 @@ class Query:
     # RELATIVE_VERSION USAGE: (-1, -2, etc)
     """
     def select_version(self, search_key, search_key_index, projected_columns_index, relative_version):
-        rids_combined = self.table.index.locate(search_key_index, search_key)
-        if not rids_combined:
+        rid = self.table.index.locate(search_key_index, search_key)
+        if not rid:
             
             print("No records found", search_key, search_key_index)
             return None
-        rid_list = rids_combined.split(",")
-        # Here, each element in record_lineages is already a lineage (a list of records)
-        results = []
-        for rid in rid_list:
-            temp_rid = rid
-            for i in range(abs(relative_version-2)):
-                temp_record_path, offset = self.table.page_directory[temp_rid]
-                temp_record = self.table.bufferpool.get_page(temp_record_path).read_index(offset)
-                temp_rid = temp_record.indirection  
-                if temp_rid == temp_record.base_rid:
-                    break
-                
-            modified_record = copy.deepcopy(temp_record) 
-            modified_record.columns = [element for element, bit in zip(temp_record.columns, projected_columns_index) if bit == 1]
-            results.append(temp_record)
-            
-        return results
+        rid_list = [rid]
+        # Tail records hold full rows, so a version is one record: walk the indirection chain to it
+        return self._walk_versions(rid_list, abs(relative_version-2), stop_at_base=True)
 
 
     """
@@ -295,35 +399,51 @@ class Query:
         base_rid = self.table.index.locate(0, primary_key)
         if base_rid is False or not base_rid:
             return False
-        if isinstance(base_rid, bytes):
-            base_rid = base_rid.decode()
+        # Nothing to change: the latest version already holds every value, so write no tail record
+        if all(column is None for column in columns):
+            return True
+        return self._update_by_rid(base_rid, *columns)
+
+
+    def _update_by_rid(self, base_rid, *columns):
+        # update() once the base rid is known, for callers that already located it
+        page_directory = self.table.page_directory
+        bufferpool = self.table.bufferpool
 
         # Retrieve base record
-        base_path, base_offset = self.table.page_directory[base_rid]
-        base_record = self.table.bufferpool.get_page(base_path).read_index(base_offset)
-        self.table.bufferpool.unpin_page(base_path)
+        base_path, base_offset = page_directory[base_rid]
+        base_record = bufferpool.get_page(base_path).read_index(base_offset)
+        bufferpool.unpin_page(base_path)
 
         is_first_update = base_record.indirection == base_record.rid
+        # One clock read covers both tail records written by this update
+        now = time.time_ns()
+        # Both tail writes below go to this page range's current tail page
+        base_pagerange_index = _pagerange_index(base_path)
+        tail_page_locations = self.table.tail_page_locations
 
         if not is_first_update:
-            last_tail_path, last_tail_offset = self.table.page_directory[base_record.indirection]
-            last_tail_record = self.table.bufferpool.get_page(last_tail_path).read_index(last_tail_offset)
-            self.table.bufferpool.unpin_page(last_tail_path)
+            # A select since the last write (e.g. increment) already cached the latest version; reuse it
+            cached = self.table.materialized_cache.get(base_rid)
+            if cached is not None and cached[1].rid == base_record.indirection:
+                last_tail_record = cached[1]
+            else:
+                last_tail_path, last_tail_offset = page_directory[base_record.indirection]
+                last_tail_record = bufferpool.get_page(last_tail_path).read_index(last_tail_offset)
+                bufferpool.unpin_page(last_tail_path)
         else:
-            # Extract pagerange index from base_path efficiently
-            base_pagerange_index = int(base_path.split("pagerange_")[1].split("/")[0])
             original_copy = Record(
                 base_record.rid,
                 base_record.rid,
                 f"t{self.table.current_tail_rid}",
-                time.time(),
+                now,
                 [1 if col is not None else 0 for col in columns],
                 base_record.columns
             )
             self.table.current_tail_rid += 1
 
-            current_tail_path = self.table.tail_page_locations[base_pagerange_index]
-            current_tail_page = self.table.bufferpool.get_page(current_tail_path)
+            current_tail_path = tail_page_locations[base_pagerange_index]
+            current_tail_page = bufferpool.get_page(current_tail_path)
             
             # Handle page capacity
             if current_tail_page.has_capacity():
@@ -332,32 +452,24 @@ class Query:
                 new_path = f"{self.table.path}/pagerange_{base_pagerange_index}/tail/page_{len(self.table.tail_page_locations)-1}"
                 new_page = Page()
                 new_page.write(original_copy)
-                self.table.bufferpool.add_frame(new_path, new_page)
-                self.table.bufferpool.update_page(current_tail_path, make_dirty=True)
+                bufferpool.add_frame(new_path, new_page)
+                bufferpool.update_page(current_tail_path, make_dirty=True)
                 self.table.tail_page_locations[base_pagerange_index] = new_path
                 insert_path, offset = new_path, 0
 
-            self.table.page_directory[original_copy.rid] = [insert_path, offset]
+            page_directory[original_copy.rid] = (insert_path, offset)
             last_tail_record = original_copy
-            self.table.bufferpool.unpin_page(current_tail_path)
+            bufferpool.unpin_page(current_tail_path)
         
-        # Prepare new record
-        schema_len = len(columns)
-        new_schema = []
-        new_cols = []
-        for i in range(schema_len):
-            if columns[i] is not None:
-                new_schema.append(1)
-                new_cols.append(columns[i])
-            else:
-                new_schema.append(last_tail_record.schema_encoding[i])
-                new_cols.append(last_tail_record.columns[i])
+        # Prepare new record: updated columns take the new value, the rest carry over
+        new_schema = [1 if value is not None else bit for value, bit in zip(columns, last_tail_record.schema_encoding)]
+        new_cols = [value if value is not None else prev for value, prev in zip(columns, last_tail_record.columns)]
 
         record = Record(
             base_record.rid,
             last_tail_record.rid,
             f"t{self.table.current_tail_rid}",
-            time.time(),
+            now,
             new_schema,
             new_cols
         )
@@ -367,24 +479,22 @@ class Query:
         base_record.indirection = record.rid
 
         # Write new tail record
-        base_pagerange_index = int(base_path.split("pagerange_")[1].split("/")[0])
-        
-        current_tail_path = self.table.tail_page_locations[base_pagerange_index]
-        current_tail_page = self.table.bufferpool.get_page(current_tail_path)
+        current_tail_path = tail_page_locations[base_pagerange_index]
+        current_tail_page = bufferpool.get_page(current_tail_path)
 
         if current_tail_page.has_capacity():
             current_tail_page.write(record)
-            self.table.bufferpool.update_page(current_tail_path, make_dirty=True)
+            bufferpool.update_page(current_tail_path, make_dirty=True)
             insert_path, offset = current_tail_path, current_tail_page.num_records - 1
         else:
             new_path = f"{self.table.path}/pagerange_{base_pagerange_index}/tail/page_{len(self.table.tail_page_locations)-1}"
             new_page = Page()
             new_page.write(record)
-            self.table.bufferpool.add_frame(new_path, new_page)
-            self.table.bufferpool.update_page(new_path, make_dirty=True)
+            bufferpool.add_frame(new_path, new_page)
+            bufferpool.update_page(new_path, make_dirty=True)
             insert_path, offset = new_path, 0
 
-        self.table.page_directory[record.rid] = [insert_path, offset]
+        page_directory[record.rid] = (insert_path, offset)
         self.table.current_tail_rid += 1
 
         # Merge logic
@@ -392,7 +502,8 @@ class Query:
         if self.table.pr_unmerged_updates[base_pagerange_index] >= MERGE_THRESH:
             self.table.merge(base_pagerange_index)
             
-        self.table.bufferpool.unpin_page(current_tail_path)
+        bufferpool.unpin_page(current_tail_path)
+        self.table.materialized_cache.pop(base_rid, None)
         return True
 
     
@@ -405,17 +516,18 @@ class Query:
     # Returns False if no record exists in the given range
     """
     def sum(self, start_range, end_range, aggregate_column_index):
-        # Use locate_range to obtain a dictionary mapping keys to decoded RID strings
+        # Use locate_range to obtain a dictionary mapping keys to RID strings
         rid_dict = self.table.index.locate_range(start_range, end_range, 0)
         if not rid_dict:
             return False
-        # Get the list of RID strings from the dictionary values
-        rids = list(rid_dict.values())
+        # Read the aggregate column straight off each latest version, no projected Record per row,
+        # fetching each page once for all the rids on it
         range_sum = 0
-        for rid in rids:
-            merged_record = self._get_merged_lineage(rid, [1] * self.table.num_columns)
-            if merged_record and merged_record.columns[aggregate_column_index] is not None:
-                range_sum += merged_record.columns[aggregate_column_index]
+        for latest in self._get_latest_records_many(rid_dict.values()):
+            if latest:
+                value = latest[1].columns[aggregate_column_index]
+                if value is not None:
+                    range_sum += value
         return range_sum
       
     
@@ -434,16 +546,8 @@ class Query:
         if rids == False:
 
             return False
-        rids = list(rids.values())
         
-        for rid in rids:     
-            temp_rid = rid
-            for i in range(abs(relative_version-2)):
-                temp_record_path, offset = self.table.page_directory[temp_rid]
-                temp_record = self.table.bufferpool.get_page(temp_record_path).read_index(offset)
-                self.table.bufferpool.unpin_page(temp_record_path)
-                temp_rid = temp_record.indirection
-                       
+        for temp_record in self._walk_versions(rids.values(), abs(relative_version-2), stop_at_base=False):
             range_sum += temp_record.columns[aggregate_column_index]
         return range_sum
         
@@ -457,10 +561,31 @@ class Query:
     # Returns False if no record matches key or if target record is locked by 2PL.
     """
     def increment(self, key, column):
-        r = self.select(key, self.table.key, [1] * self.table.num_columns)[0]
-        if r is not False:
-            updated_columns = [None] * self.table.num_columns
-            updated_columns[column] = r[column] + 1
-            u = self.update(key, *updated_columns)
-            return u
-        return False
+        base_rid = self.table.index.locate(self.table.key, key)
+        if base_rid == False:
+            return False
+        # Read the current value straight off the latest version, without building a projected record
+        latest = self._get_latest_records(base_rid)
+        if not latest:
+            return False
+        updated_columns = [None] * self.table.num_columns
+        updated_columns[column] = latest[1].columns[column] + 1
+        # The base rid is already known, so skip update's second index lookup
+        return self._update_by_rid(base_rid, *updated_columns)
+
+
+_PAGERANGE_RE = re.compile(r"pagerange_(\d+)/")
+# Optional file extension after the page number is ignored
+_PAGE_PATH_RE = re.compile(r"pagerange_(\d+)/(?:base|tail)/page_(\d+)(?:\.\w+)?$")
+
+
+# Hot page paths are parsed once; bounded so old tables' paths don't pile up for the process's life
+@lru_cache(maxsize=4096)
+def _pagerange_index(path):
+    return int(_PAGERANGE_RE.search(path).group(1))
+
+
+@lru_cache(maxsize=4096)
+def _page_path_indices(path):
+    pagerange_index, page_index = _PAGE_PATH_RE.search(path).groups()
+    return int(pagerange_index), int(page_index)
@@ -1,14 +1,17 @@
 import os
 import threading
-import time
 import traceback
+from collections import OrderedDict
 from lstore.index import Index
-from lstore.config import PAGE_SIZE, PAGE_RANGE_SIZE
 from lstore.bufferpool import BufferPool
 from lstore.page import Page
-import copy
+
+# Serialized form of an empty page, written as the placeholder for each new page file
+EMPTY_PAGE_BYTES = Page().serialize()
 
 class Record:
+    # No per-instance __dict__: a Record is built for every write and every record read off disk
+    __slots__ = ('indirection', 'rid', 'start_time', 'schema_encoding', 'columns', 'base_rid')
 
     def __init__(self, base_rid, indirection, rid, start_time, schema_encoding, columns, last_updated_time=None):
         self.indirection = indirection          # points to rid of previous versioned record. base record points to most recent record -> next most recent
@@ -45,6 +48,7 @@ class Table:
         self.last_path = os.path.join(self.path, "pagerange_0/base/page_0") # Path to last base page on disk (for insert)
         self.current_base_rid = 0                           # Rid of last base record
         self.current_tail_rid = 0                           # Rid of last tail record
+        self.materialized_cache = OrderedDict()             # {base_rid: (base_record, latest_record)}, LRU; dropped on update/delete
 
         # Merging attributes
         self.merge_count = 0
@@ -73,7 +77,7 @@ class Table:
                 self.tail_page_locations.append(page_0_path)
             if not os.path.exists(page_0_path):  # Only create if it doesn't exist
                 with open(page_0_path, 'wb') as f:
-                    f.write(Page().serialize())
+                    f.write(EMPTY_PAGE_BYTES)
 
 
     def __repr__(self):
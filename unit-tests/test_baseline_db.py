@@ -0,0 +1,54 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lstore.db import Database
+from lstore.query import Query
+
+# ECS165 database written by the original code: 60 rows (1000 + k, k % 7, k * 3), every tenth row updated to k * 3 + 1
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_db', 'ECS165')
+
+class testingBaselineDatabase(unittest.TestCase):
+    def setUp(self):
+        # Page paths in the metadata are relative, so run from a scratch copy
+        self.old_cwd = os.getcwd()
+        self.work_dir = tempfile.mkdtemp()
+        shutil.copytree(FIXTURE, os.path.join(self.work_dir, 'ECS165'))
+        os.chdir(self.work_dir)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.work_dir)
+
+    def open_grades(self):
+        db = Database()
+        db.open('ECS165')
+        return db, db.get_table('Grades')
+
+    def check_grades(self, table):
+        query = Query(table)
+        self.assertEqual(query.select(1010, 0, [1, 1, 1])[0].columns, [1010, 3, 31])
+        self.assertEqual(query.select(1011, 0, [1, 1, 1])[0].columns, [1011, 4, 33])
+        self.assertEqual(query.sum(1000, 1059, 2), 5316)
+
+    def test_open(self):
+        db, table = self.open_grades()
+        self.assertEqual(len(table.index.primary_key_cache), 60)
+        # The old bytes rids are rebuilt as str on first load
+        self.assertEqual(table.index.locate(0, 1010), 'b10')
+        self.assertEqual(table.index.sorted_keys, list(range(1000, 1060)))
+        self.check_grades(table)
+        db.close()
+
+    def test_reopen(self):
+        # close() must write back the loaded data, not an empty table
+        db, table = self.open_grades()
+        db.close()
+        db, table = self.open_grades()
+        self.check_grades(table)
+        db.close()
+
+if __name__ == '__main__':
+    unittest.main()
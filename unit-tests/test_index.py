@@ -0,0 +1,82 @@
+import os
+import sys
+import pickle
+import shutil
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lstore.table import Table, Record
+
+# Index pickle written by the original code for 60 rows (1000 + k, k % 7, k * 3)
+BASELINE_INDEX = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_db', 'ECS165', '_tables', 'Grades_index.pickle')
+
+class testingIndex(unittest.TestCase):
+    def setUp(self):
+        # Only the index is exercised, but the table still lays out its first page range
+        self.table = Table('test', 3, 0, './ECS165')
+        self.index = self.table.index
+        self.latest = {}
+
+    def tearDown(self):
+        if os.path.exists('./ECS165'):
+            shutil.rmtree('./ECS165')
+
+    def insert(self, n, value):
+        rid = f"b{n}"
+        self.index.add_record(Record(rid, rid, rid, 0, [0, 0, 0], [n, value, n % 5]))
+        self.latest[value] = rid
+
+    def check_duplicates(self):
+        # locate and locate_range both return the most recent rid for a repeated value
+        for value, rid in self.latest.items():
+            self.assertEqual(self.index.locate(1, value), rid)
+        self.assertEqual(self.index.locate_range(min(self.latest), max(self.latest), 1), self.latest)
+        self.assertEqual(self.index.locate_range(3, 5, 1), {v: r for v, r in self.latest.items() if 3 <= v <= 5})
+
+    def test_duplicates_before_and_after_flush(self):
+        self.index.delta_threshold = 50
+        for n in range(400):
+            self.insert(n, (n * 7) % 13)
+            if n % 37 == 0:
+                for value, rid in self.latest.items():
+                    self.assertEqual(self.index.locate(1, value), rid)
+        self.check_duplicates()
+        self.index.flush_cache()
+        self.check_duplicates()
+        # New duplicates after the flush sit in the delta in front of the tree's older rids
+        for n in range(400, 420):
+            self.insert(n, n % 4)
+        self.check_duplicates()
+        self.index.flush_cache()
+        self.check_duplicates()
+
+    def test_locate_range_returns_copies(self):
+        for n in range(10):
+            self.insert(n, n)
+        result = self.index.locate_range(0, 9, 1)
+        result.clear()
+        self.assertEqual(len(self.index.locate_range(0, 9, 1)), 10)
+
+    def test_missing(self):
+        self.insert(0, 1)
+        self.assertFalse(self.index.locate(1, 2))
+        self.assertFalse(self.index.locate(0, 99))
+        self.assertFalse(self.index.locate_range(5, 9, 1))
+
+    def test_load_baseline_pickle(self):
+        with open(BASELINE_INDEX, 'rb') as f:
+            index_data = pickle.load(f)
+        self.assertNotIn('sorted_keys', index_data)
+        tree = index_data['indices'][1]
+        keys = [k for k, _ in tree.items()]
+        self.assertEqual(keys, sorted(k % 7 for k in range(60)))
+        self.assertTrue(all(tree.might_contain(k) for k in range(7)))
+        self.assertIn(tree[3], [f"b{n}".encode() for n in range(3, 60, 7)])
+        # The loaded tree keeps accepting inserts, both appended and in the middle
+        tree[7] = b"b60"
+        tree[3] = b"b61"
+        self.assertEqual(tree.max_key(), 7)
+        self.assertEqual(tree[3], b"b61")
+        self.assertEqual(len(tree), 62)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from lstore.page import Page, NULL_VALUE, NULL_VALUE_32, INT32_MAX, PACKED_MAGIC, PACKED32_MAGIC
+from lstore.table import Record
+
+def record_fields(record):
+    return (record.base_rid, record.indirection, record.rid, record.start_time, record.schema_encoding, record.columns)
+
+class testingPageSerialization(unittest.TestCase):
+    def round_trip(self, *columns_list):
+        page = Page()
+        for i, columns in enumerate(columns_list):
+            page.write(Record(f"b{i}", f"t{i}", f"b{i}", i, [0] * len(columns), list(columns)))
+        data = page.serialize()
+        loaded = Page.deserialize(data)
+        self.assertEqual(loaded.num_records, page.num_records)
+        self.assertEqual([record_fields(r) for r in loaded.data], [record_fields(r) for r in page.data])
+        return data[:1]
+
+    def test_empty(self):
+        self.assertEqual(Page.deserialize(Page().serialize()).num_records, 0)
+
+    def test_int32_boundaries(self):
+        # Values strictly inside the int32 range keep the narrow layout
+        self.assertEqual(self.round_trip([INT32_MAX, NULL_VALUE_32 + 1, 0], [None, -1, 1]), PACKED32_MAGIC)
+        # The int32 None marker and anything past INT32_MAX need int64 columns
+        self.assertEqual(self.round_trip([NULL_VALUE_32, 0, None]), PACKED_MAGIC)
+        self.assertEqual(self.round_trip([INT32_MAX + 1, 0, None]), PACKED_MAGIC)
+
+    def test_null_value(self):
+        # A real NULL_VALUE can't share the int64 None marker, so the page goes to msgpack
+        magic = self.round_trip([NULL_VALUE, None, 3])
+        self.assertNotIn(magic, (PACKED_MAGIC, PACKED32_MAGIC))
+
+    def test_msgpack_fallback(self):
+        magic = self.round_trip([1 << 63, 2, 3], [4, None, 6])
+        self.assertNotIn(magic, (PACKED_MAGIC, PACKED32_MAGIC))
+
+if __name__ == '__main__':
+    unittest.main()